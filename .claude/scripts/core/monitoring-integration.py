@@ -15,9 +15,18 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 # Load modules with hyphens in names
 def load_module(name, path):
+    # Reuse a module already loaded in this process instead of re-executing it
+    if name in sys.modules:
+        return sys.modules[name]
+    
     spec = importlib.util.spec_from_file_location(name, path)
     module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
     return module
 
 # Get base directory
@@ -8,11 +8,51 @@ import json
 import re
 from typing import Any, Dict, List, Union, Optional, Callable
 from dataclasses import dataclass
-from jsonpath_ng import parse
-from functools import reduce
+# The extended grammar adds the [?(...)] filters used in mappings
+from jsonpath_ng.ext import parse
+from functools import reduce, lru_cache
 import operator
 
 
+@lru_cache(maxsize=256)
+def _compile_expression(expression: str):
+    """Compile a transform expression once; None if it is not valid Python"""
+    try:
+        # eval() of a string drops leading spaces and tabs, compile() doesn't
+        return compile(expression.lstrip(' \t'), '<transform>', 'eval')
+    except SyntaxError:
+        return None
+
+
+# Operators that a simple "item <op> <number>" expression can use
+_BINARY_OPERATORS = {
+    '==': operator.eq, '!=': operator.ne,
+    '<': operator.lt, '<=': operator.le,
+    '>': operator.gt, '>=': operator.ge,
+    '+': operator.add, '-': operator.sub,
+    '*': operator.mul, '/': operator.truediv,
+    '//': operator.floordiv, '%': operator.mod,
+}
+
+# Only number literals Python itself accepts, e.g. no leading zeros
+_SIMPLE_EXPRESSION = re.compile(
+    r'\s*item\s*(==|!=|<=|>=|<|>|\+|-|\*|//|/|%)\s*(-?(?:0|[1-9]\d*)(?:\.\d+)?)\s*'
+)
+
+
+@lru_cache(maxsize=256)
+def _simple_operation(expression: str):
+    """Match "item <op> <number>"; returns (operator, number) or None"""
+    # Anything eval would reject must keep failing the same way; the
+    # compile check also settles which leading whitespace eval accepts
+    match = _SIMPLE_EXPRESSION.fullmatch(expression)
+    if match is None or _compile_expression(expression) is None:
+        return None
+    number = match.group(2)
+    return (_BINARY_OPERATORS[match.group(1)],
+            float(number) if '.' in number else int(number))
+
+
 @dataclass
 class MappingRule:
     """Defines a mapping rule for output transformation"""
@@ -95,14 +135,29 @@ class OutputTransformer:
         if not isinstance(value, list):
             raise ValueError("Filter requires array input")
         
+        # Comparisons against a number run as a plain operator call; if any
+        # item raises, redo it below where such items are skipped
+        simple = _simple_operation(condition)
+        if simple is not None:
+            op, number = simple
+            try:
+                return [item for item in value if op(item, number)]
+            except Exception:
+                pass
+        
         # Parse condition (e.g., "item > 5", "item.status == 'active'")
-        # Simple implementation - can be extended
+        # once, then evaluate the compiled code for each item
+        code = _compile_expression(condition)
+        if code is None:
+            return []
+        
         filtered = []
+        global_vars = {"__builtins__": {}}
+        local_vars = {}
         for item in value:
             try:
-                # Create local scope for evaluation
-                local_vars = {"item": item}
-                if eval(condition, {"__builtins__": {}}, local_vars):
+                local_vars["item"] = item
+                if eval(code, global_vars, local_vars):
                     filtered.append(item)
             except Exception:
                 continue
@@ -114,13 +169,26 @@ class OutputTransformer:
         if not isinstance(value, list):
             raise ValueError("Map requires array input")
         
+        simple = _simple_operation(expression)
+        if simple is not None:
+            op, number = simple
+            try:
+                return [op(item, number) for item in value]
+            except Exception:
+                pass
+        
+        code = _compile_expression(expression)
+        if code is None:
+            return [None] * len(value)
+        
         mapped = []
+        global_vars = {"__builtins__": {}}
+        local_vars = {}
         for item in value:
             try:
-                local_vars = {"item": item}
-                result = eval(expression, {"__builtins__": {}}, local_vars)
-                mapped.append(result)
-            except Exception as e:
+                local_vars["item"] = item
+                mapped.append(eval(code, global_vars, local_vars))
+            except Exception:
                 mapped.append(None)
         return mapped
     
@@ -131,8 +199,8 @@ class OutputTransformer:
             raise ValueError("Reduce requires array input")
         
         operations = {
-            'sum': lambda x, y: x + y,
-            'product': lambda x, y: x * y,
+            'sum': operator.add,
+            'product': operator.mul,
             'min': min,
             'max': max,
             'count': lambda x, _: x + 1,
@@ -144,16 +212,30 @@ class OutputTransformer:
                 return operations[operation](value)
             elif operation == 'count':
                 return len(value)
-            else:
-                return reduce(operations[operation], value, initial or 0)
+            
+            start = initial or 0
+            if operation == 'sum' and not isinstance(start, (str, bytes, bytearray)):
+                # sum() refuses string starts, which reduce would concatenate
+                return sum(value, start)
+            if operation == 'concat' and value:
+                # Same as the pairwise str() concatenation, without the
+                # quadratic copying
+                return str(start) + ''.join(map(str, value))
+            return reduce(operations[operation], value, start)
         else:
-            # Custom reduce expression
-            return reduce(lambda x, y: eval(operation, {"__builtins__": {}, "acc": x, "item": y}), value, initial)
+            # Custom reduce expression, compiled once (an invalid one is left
+            # as source so eval raises its SyntaxError as before)
+            code = _compile_expression(operation) or operation
+            return reduce(lambda x, y: eval(code, {"__builtins__": {}, "acc": x, "item": y}), value, initial)
 
 
 class OutputMapper:
     """Maps complex TES outputs to workflow variables"""
     
+    # Compiled JSONPath expressions, shared by all mappers; mapping sources
+    # repeat across calls and jsonpath_ng parsing is expensive
+    _parse = staticmethod(lru_cache(maxsize=256)(parse))
+    
     def __init__(self):
         self.transformer = OutputTransformer()
         self.transformers = {
@@ -164,13 +246,15 @@ class OutputMapper:
             'object': self.transformer.to_object,
         }
     
-    def map_output(self, output: Dict[str, Any], mappings: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def map_output(self, output: Dict[str, Any],
+                   mappings: Union[List[Dict[str, Any]], Dict[str, str]]) -> Dict[str, Any]:
         """
         Map tool output to workflow variables based on mapping rules
         
         Args:
             output: Raw tool output
-            mappings: List of mapping rules
+            mappings: List of mapping rules, or an old-style dict of
+                top-level output field to target variable
             
         Returns:
             Mapped variables dictionary
@@ -178,6 +262,21 @@ class OutputMapper:
         result = {}
         errors = []
         
+        if isinstance(mappings, dict):
+            # Old-style mappings: read each field directly, without building
+            # intermediate rules
+            for source, target in mappings.items():
+                try:
+                    value = self._extract_value(output, '$.' + source)
+                    if value is not None:
+                        result[target] = value
+                except Exception as e:
+                    errors.append(f"Error mapping '$.{source}': {str(e)}")
+            
+            if errors:
+                result['_mapping_errors'] = errors
+            return result
+        
         for mapping_config in mappings:
             try:
                 rule = MappingRule(**mapping_config)
@@ -210,7 +309,7 @@ class OutputMapper:
         """Extract value using JSONPath expression"""
         if path.startswith('$'):
             # JSONPath expression
-            jsonpath_expr = parse(path)
+            jsonpath_expr = self._parse(path)
             matches = jsonpath_expr.find(data)
             if matches:
                 # Return first match for single value, array for multiple
@@ -362,7 +461,7 @@ if __name__ == '__main__':
             "transform": "array"
         },
         {
-            "source": "$.data.users[?(@.active)].name",
+            "source": "$.data.users[?(@.active == true)].name",
             "target": "active_users",
             "transform": "array"
         },
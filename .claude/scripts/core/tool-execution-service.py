@@ -282,6 +282,9 @@ class ToolExecutionService:
         
         # Progress tracking
         self.progress_callbacks: Dict[str, Callable] = {}
+        
+        # In-process handlers that replace running a script's subprocess
+        self.builtin_handlers: Dict[str, Callable[[Dict[str, Any]], str]] = {}
         self.execution_stats = defaultdict(lambda: {
             'total_executions': 0,
             'total_failures': 0,
@@ -635,6 +638,18 @@ class ToolExecutionService:
         """Unregister a progress callback"""
         self.progress_callbacks.pop(execution_id, None)
     
+    def register_builtin_handler(self, script_id: str, handler: Callable[[Dict[str, Any]], str]):
+        """Run a script in-process with handler instead of starting its subprocess
+        
+        The handler receives the validated arguments and returns what the
+        script would have written to stdout.
+        """
+        self.builtin_handlers[script_id] = handler
+    
+    def unregister_builtin_handler(self, script_id: str):
+        """Unregister a built-in handler"""
+        self.builtin_handlers.pop(script_id, None)
+    
     async def execute_async(self, script_id: str, arguments: Dict[str, Any],
                            priority: JobPriority = JobPriority.NORMAL,
                            progress_callback: Optional[Callable] = None) -> str:
@@ -767,6 +782,12 @@ class ToolExecutionService:
                 retry_count=retry_count
             )
         
+        # Trivial scripts can be run in-process without a subprocess
+        handler = self.builtin_handlers.get(script.get('id'))
+        if handler is not None:
+            return self._execute_builtin(script, handler, arguments, retry_count,
+                                         start_time, start_timestamp)
+        
         # Build command
         script_path = self.scripts_dir / script['path']
         if not script_path.exists():
@@ -1114,6 +1135,46 @@ class ToolExecutionService:
                 retry_count=retry_count
             )
     
+    def _execute_builtin(self, script: Dict[str, Any], handler: Callable[[Dict[str, Any]], str],
+                         arguments: Dict[str, Any], retry_count: int,
+                         start_time: float, start_timestamp: datetime.datetime) -> ExecutionResult:
+        """Execute a script through its built-in handler"""
+        try:
+            stdout_data = handler(arguments)
+        except Exception as e:
+            error_msg = f"Built-in handler failed: {e}"
+            return ExecutionResult(
+                success=False,
+                exit_code=1,
+                stdout="",
+                stderr=traceback.format_exc(),
+                outputs={},
+                execution_time=time.time() - start_time,
+                error=error_msg,
+                error_details=self._create_error_details(
+                    ErrorCategory.EXECUTION,
+                    error_msg,
+                    script,
+                    e,
+                    retry_count=retry_count
+                ),
+                start_timestamp=start_timestamp,
+                end_timestamp=datetime.datetime.now(),
+                retry_count=retry_count
+            )
+        
+        return ExecutionResult(
+            success=True,
+            exit_code=0,
+            stdout=stdout_data,
+            stderr="",
+            outputs=self._parse_outputs(stdout_data, script.get('outputs', [])),
+            execution_time=time.time() - start_time,
+            start_timestamp=start_timestamp,
+            end_timestamp=datetime.datetime.now(),
+            retry_count=retry_count
+        )
+    
     def _parse_outputs(self, stdout: str, output_definitions: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Parse script outputs based on definitions"""
         outputs = {}
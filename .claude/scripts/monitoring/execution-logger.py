@@ -10,13 +10,18 @@ import sys
 import logging
 import datetime
 import gzip
+import operator
 import shutil
+import zlib
 from pathlib import Path
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass, asdict
+from typing import Dict, List, Any, Optional, Callable
+from dataclasses import dataclass, asdict, fields
 from enum import Enum
 import threading
-from queue import Queue
+from itertools import islice
+from queue import Queue, Empty
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import time
 
 
@@ -51,14 +56,46 @@ class ExecutionLogEntry:
     
     def to_json(self) -> str:
         """Convert to JSON string"""
-        data = asdict(self)
-        data['level'] = self.level.value
-        return json.dumps(data)
+        return _entry_to_json(self)
+
+
+def _compile_entry_serializer() -> Callable[[ExecutionLogEntry], str]:
+    """Generate a JSON serializer specialized to ExecutionLogEntry's fields
+    
+    The generated function builds the output dict as a single literal, which
+    avoids asdict()'s field introspection and deep copies of nested dicts.
+    """
+    items = ', '.join(
+        f"{f.name!r}: entry.{f.name}.value" if f.name == 'level' else f"{f.name!r}: entry.{f.name}"
+        for f in fields(ExecutionLogEntry)
+    )
+    namespace = {'_dumps': json.dumps}
+    exec(f"def to_json(entry):\n    return _dumps({{{items}}})", namespace)
+    return namespace['to_json']
+
+
+_entry_to_json = _compile_entry_serializer()
 
 
 class ExecutionLogger:
     """Handles logging of all script executions"""
     
+    # Maximum number of queued entries the writer thread batches per write
+    MAX_BATCH_ENTRIES = 1000
+    
+    # Uncompressed bytes per gzip member in rotated logs
+    COMPRESSED_BLOCK_BYTES = 1024 * 1024
+    
+    # Entry fields recorded in the sidecar index of rotated logs
+    INDEXED_FIELDS = ('script_id', 'specialist')
+    
+    # Largest single write(); O_APPEND writes up to this size land as one
+    # contiguous block, so lines from several processes never interleave
+    ATOMIC_WRITE_BYTES = 4096
+    
+    # Entries kept in memory to answer unfiltered queries without a scan
+    RECENT_ENTRIES = 1024
+    
     def __init__(self, log_dir: str = None, 
                  rotation_size_mb: int = 100,
                  retention_days: int = 30,
@@ -87,9 +124,29 @@ class ExecutionLogger:
         # Current log file
         self.current_log_file = self._get_current_log_file()
         
+        # Append-only descriptor for the current log file, opened on first
+        # write, and the (st_dev, st_ino) of the file it refers to
+        self._fd = None
+        self._fd_id = None
+        
+        # Serializes writers sharing the descriptor; only the writer thread
+        # takes it in async mode, any caller of log() in sync mode
+        self._write_lock = threading.Lock()
+        
+        # Bytes in the current log file, resynced from disk once per write
+        self._bytes_written = self._current_file_size()
+        
+        # Entries this process has written to today's log, oldest first,
+        # guarded by _write_lock. Only used for queries while it mirrors the
+        # whole of today's log.
+        self._recent = deque(maxlen=self.RECENT_ENTRIES)
+        self._recent_day = datetime.date.today()
+        self._recent_complete = self._is_empty_day(self._recent_day)
+        
         # Async logging queue and thread
         if self.async_logging:
             self.log_queue = Queue()
+            self._wbuf = bytearray()  # Reused by the writer thread per batch
             self.writer_thread = threading.Thread(target=self._log_writer_thread, daemon=True)
             self.writer_thread.start()
         
@@ -105,38 +162,149 @@ class ExecutionLogger:
         date_str = datetime.datetime.now().strftime('%Y-%m-%d')
         return self.log_dir / f'executions-{date_str}.jsonl'
     
-    def _rotate_if_needed(self):
-        """Check if log rotation is needed and perform it"""
+    def _is_empty_day(self, day: datetime.date) -> bool:
+        """Check that no entries have been logged for day yet"""
+        if (self.log_dir / f'executions-{day}.jsonl').exists():
+            return False
+        return not any(self.log_dir.glob(f'executions-{day}-*.jsonl.gz'))
+    
+    def _current_file_size(self) -> int:
+        """Get the on-disk size of the current log file"""
         if not self.current_log_file.exists():
+            return 0
+        return self.current_log_file.stat().st_size
+    
+    def _open_log_fd(self):
+        """Open the current log file for appending"""
+        flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, 'O_CLOEXEC', 0)
+        self._fd = os.open(self.current_log_file, flags, 0o644)
+        stat = os.fstat(self._fd)
+        self._fd_id = (stat.st_dev, stat.st_ino)
+        self._bytes_written = stat.st_size
+    
+    def _close_log_fd(self):
+        """Close the current log file descriptor if open"""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+            self._fd_id = None
+    
+    def _sync_log_fd(self):
+        """Follow changes other processes made to the current log file
+        
+        Drops the descriptor if the file it refers to was rotated away, so
+        the next write can't land in a file that is about to be compressed
+        and deleted, and resyncs the size with any lines they appended.
+        """
+        try:
+            stat = os.stat(self.current_log_file)
+        except FileNotFoundError:
+            if self._bytes_written:
+                self._recent_complete = False
+            self._close_log_fd()
+            self._bytes_written = 0
             return
         
-        file_size = self.current_log_file.stat().st_size
-        if file_size >= self.rotation_size_bytes:
+        if self._fd is not None and (stat.st_dev, stat.st_ino) != self._fd_id:
+            self._recent_complete = False
+            self._close_log_fd()
+        elif stat.st_size != self._bytes_written:
+            self._recent_complete = False
+        self._bytes_written = stat.st_size
+    
+    def _rotate_if_needed(self):
+        """Check if log rotation is needed and perform it"""
+        self._sync_log_fd()
+        if self._bytes_written >= self.rotation_size_bytes:
             # Rotate the file
-            timestamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
-            rotated_name = f"{self.current_log_file.stem}-{timestamp}.jsonl"
+            # Unique per rotation, so rotations within the same second, from
+            # this or another process, can't overwrite each other's files
+            timestamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+            rotated_name = f"{self.current_log_file.stem}-{timestamp}-{os.getpid()}.jsonl"
             rotated_path = self.log_dir / rotated_name
             
-            # Move current file
-            shutil.move(str(self.current_log_file), str(rotated_path))
+            # Move current file; queries now have to merge in the rotated
+            # file, in its order
+            self._close_log_fd()
+            self._bytes_written = 0
+            self._recent_complete = False
+            try:
+                shutil.move(str(self.current_log_file), str(rotated_path))
+            except FileNotFoundError:
+                # Another process rotated it first; just start the new file
+                return
             
             # Compress the rotated file
             self._compress_file(rotated_path)
     
     def _compress_file(self, file_path: Path):
-        """Compress a log file with gzip"""
+        """Compress a log file with gzip and write its sidecar index
+        
+        The output is a sequence of independent gzip members, each holding
+        roughly COMPRESSED_BLOCK_BYTES of log lines. Together they still form
+        a regular .gz file, while the index maps every script_id and
+        specialist to the offsets of the members containing its entries.
+        Members are compressed in parallel since zlib releases the GIL.
+        """
         gz_path = file_path.with_suffix('.jsonl.gz')
+        index = {field: {} for field in self.INDEXED_FIELDS}
+        workers = os.cpu_count() or 1
+        pending = deque()
         
         try:
-            with open(file_path, 'rb') as f_in:
-                with gzip.open(gz_path, 'wb') as f_out:
-                    shutil.copyfileobj(f_in, f_out)
+            with open(file_path, 'rb') as f_in, open(gz_path, 'wb') as f_out, \
+                    ThreadPoolExecutor(max_workers=workers) as pool:
+                
+                def write_members(max_pending: int):
+                    # Members are written in submission order to keep offsets stable
+                    while len(pending) > max_pending:
+                        future, block_keys = pending.popleft()
+                        offset = f_out.tell()
+                        f_out.write(future.result())
+                        for field, values in block_keys.items():
+                            for value in values:
+                                index[field].setdefault(value, []).append(offset)
+                
+                block = []
+                block_size = 0
+                block_keys = {field: set() for field in self.INDEXED_FIELDS}
+                
+                for line in f_in:
+                    block.append(line)
+                    block_size += len(line)
+                    try:
+                        data = json.loads(line)
+                        for field in self.INDEXED_FIELDS:
+                            value = data.get(field)
+                            if isinstance(value, str):
+                                block_keys[field].add(value)
+                    except (json.JSONDecodeError, AttributeError):
+                        pass
+                    
+                    if block_size >= self.COMPRESSED_BLOCK_BYTES:
+                        pending.append((pool.submit(gzip.compress, b''.join(block)), block_keys))
+                        # Bound the number of blocks held in memory
+                        write_members(workers * 2)
+                        block = []
+                        block_size = 0
+                        block_keys = {field: set() for field in self.INDEXED_FIELDS}
+                
+                if block:
+                    pending.append((pool.submit(gzip.compress, b''.join(block)), block_keys))
+                write_members(0)
+            
+            with open(self._index_path(gz_path), 'w') as f:
+                json.dump(index, f)
             
             # Remove original file after successful compression
             file_path.unlink()
         except Exception as e:
             self.logger.error(f"Failed to compress {file_path}: {e}")
     
+    def _index_path(self, gz_path: Path) -> Path:
+        """Get the sidecar index path for a compressed log file"""
+        return gz_path.with_suffix('.idx.json')
+    
     def _cleanup_old_logs(self):
         """Remove logs older than retention period"""
         cutoff_date = datetime.datetime.now() - datetime.timedelta(days=self.retention_days)
@@ -159,34 +327,123 @@ class ExecutionLogger:
             try:
                 # Get log entry from queue (block with timeout)
                 entry = self.log_queue.get(timeout=1)
-                
+            except Empty:
+                # Queue timeout, continue
+                continue
+            
+            # Drain whatever else is already queued into one batched write
+            shutdown = False
+            taken = 1
+            batch = []
+            while True:
                 if entry is None:  # Shutdown signal
+                    shutdown = True
                     break
                 
-                self._write_log_entry(entry)
+                try:
+                    self._wbuf += entry.to_json().encode('utf-8')
+                    self._wbuf += b'\n'
+                    batch.append(entry)
+                except Exception as e:
+                    self.logger.error(f"Failed to serialize log entry: {e}")
                 
-            except Exception:
-                # Queue timeout, continue
-                continue
+                # Stop before taking an entry this batch has no room for
+                if taken >= self.MAX_BATCH_ENTRIES:
+                    break
+                try:
+                    entry = self.log_queue.get_nowait()
+                except Empty:
+                    break
+                taken += 1
+            
+            if self._wbuf:
+                self._write_payload(self._wbuf, batch)
+                # Truncate in place so the buffer's allocation is reused
+                del self._wbuf[:]
+            
+            # Only now are the batch's entries on disk
+            for _ in range(taken):
+                self.log_queue.task_done()
+            
+            if shutdown:
+                break
     
     def _write_log_entry(self, entry: ExecutionLogEntry):
         """Write a log entry to file"""
         try:
-            # Check if we need to switch to a new day's log
-            new_log_file = self._get_current_log_file()
-            if new_log_file != self.current_log_file:
-                self.current_log_file = new_log_file
-                self._cleanup_old_logs()
-            
-            # Check if rotation is needed
-            self._rotate_if_needed()
-            
-            # Append entry to log file
-            with open(self.current_log_file, 'a') as f:
-                f.write(entry.to_json() + '\n')
-                
+            payload = entry.to_json().encode('utf-8') + b'\n'
         except Exception as e:
-            self.logger.error(f"Failed to write log entry: {e}")
+            self.logger.error(f"Failed to serialize log entry: {e}")
+            return
+        
+        self._write_payload(payload, (entry,))
+    
+    def _write_payload(self, payload: bytes, entries: List[ExecutionLogEntry]):
+        """Append one or more serialized log lines to the current log file
+        
+        entries are the log entries serialized in payload, in order.
+        """
+        with self._write_lock:
+            try:
+                # Check if we need to switch to a new day's log
+                new_log_file = self._get_current_log_file()
+                if new_log_file != self.current_log_file:
+                    self._close_log_fd()
+                    self.current_log_file = new_log_file
+                    self._bytes_written = self._current_file_size()
+                    self._cleanup_old_logs()
+                    
+                    self._recent.clear()
+                    self._recent_day = datetime.date.today()
+                    self._recent_complete = self._is_empty_day(self._recent_day)
+                
+                # One stat per batch: another process may have rotated the
+                # file or appended to it since the last write
+                self._rotate_if_needed()
+                
+                if self._fd is None:
+                    self._open_log_fd()
+                
+                # Append payload to log file
+                self._append(payload)
+                self._bytes_written += len(payload)
+                
+                # Mirror what is now on disk for unfiltered queries
+                if len(self._recent) + len(entries) > self._recent.maxlen:
+                    self._recent_complete = False
+                self._recent.extend(entries)
+                    
+            except Exception as e:
+                self.logger.error(f"Failed to write log entry: {e}")
+                # The file may now hold part of the payload
+                self._recent_complete = False
+    
+    def _append(self, payload: bytes):
+        """Append payload with os.write calls split on line boundaries
+        
+        Each call carries whole lines and at most ATOMIC_WRITE_BYTES unless a
+        single line is longer, so concurrent writers to the same file from
+        other processes can't interleave within a line.
+        """
+        total = len(payload)
+        start = 0
+        
+        with memoryview(payload) as view:
+            while start < total:
+                end = start + self.ATOMIC_WRITE_BYTES
+                if end >= total:
+                    end = total
+                else:
+                    cut = payload.rfind(b'\n', start, end)
+                    if cut == -1:
+                        # Single oversized line, write it whole
+                        cut = payload.find(b'\n', end)
+                        end = total if cut == -1 else cut + 1
+                    else:
+                        end = cut + 1
+                
+                while start < end:
+                    start += os.write(self._fd, view[start:end])
     
     def log(self, entry: ExecutionLogEntry):
         """Log an execution entry"""
@@ -195,6 +452,48 @@ class ExecutionLogger:
         else:
             self._write_log_entry(entry)
     
+    def wait_idle(self, timeout: float = 5.0) -> bool:
+        """
+        Wait until every entry logged so far has been written
+        
+        Args:
+            timeout: Maximum seconds to wait, or None to wait indefinitely
+        
+        Returns:
+            True if the logger is idle, False if the timeout expired first
+        """
+        if not self.async_logging:
+            return True
+        
+        queue = self.log_queue
+        with queue.all_tasks_done:
+            return queue.all_tasks_done.wait_for(
+                lambda: not queue.unfinished_tasks, timeout
+            )
+    
+    def _recent_entries(self, limit: int) -> Optional[List[ExecutionLogEntry]]:
+        """Answer an unfiltered query for today from memory
+        
+        Returns None unless the in-memory entries are exactly today's log
+        file, i.e. nothing was logged before this process started, none have
+        been dropped, the file hasn't been rotated and no other process has
+        written to it. Entries still queued for writing aren't included,
+        just as the scan wouldn't see them.
+        """
+        with self._write_lock:
+            if (not self._recent_complete
+                    or self._recent_day != datetime.date.today()):
+                return None
+            
+            try:
+                on_disk = self.current_log_file.stat().st_size
+            except FileNotFoundError:
+                on_disk = 0
+            if on_disk != self._bytes_written:
+                return None
+            
+            return list(islice(self._recent, 0, limit))
+    
     def log_execution(self,
                      script_id: str,
                      specialist: str,
@@ -292,6 +591,13 @@ class ExecutionLogger:
         Returns:
             List of matching log entries
         """
+        if (start_date is None and end_date is None and script_id is None
+                and specialist is None and user is None and success is None
+                and level is None):
+            recent = self._recent_entries(limit)
+            if recent is not None:
+                return recent
+        
         if start_date is None:
             start_date = datetime.datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
         if end_date is None:
@@ -299,6 +605,10 @@ class ExecutionLogger:
         
         results = []
         
+        # Resolve the filters once for every line scanned by this query
+        needles = self._line_needles(script_id, specialist, user, level)
+        matches = self._compile_filters(script_id, specialist, user, success, level)
+        
         # Iterate through log files in date range
         current_date = start_date.date()
         while current_date <= end_date.date():
@@ -306,13 +616,13 @@ class ExecutionLogger:
             
             if log_file.exists():
                 results.extend(self._query_file(
-                    log_file, script_id, specialist, user, success, level, limit - len(results)
+                    log_file, needles, matches, limit - len(results)
                 ))
             
             # Also check compressed files
             for gz_file in self.log_dir.glob(f'executions-{current_date}-*.jsonl.gz'):
                 results.extend(self._query_compressed_file(
-                    gz_file, script_id, specialist, user, success, level, limit - len(results)
+                    gz_file, script_id, specialist, needles, matches, limit - len(results)
                 ))
             
             if len(results) >= limit:
@@ -322,85 +632,157 @@ class ExecutionLogger:
         
         return results[:limit]
     
-    def _query_file(self, file_path: Path, script_id: str, specialist: str,
-                   user: str, success: Optional[bool], level: Optional[LogLevel],
+    def _query_file(self, file_path: Path, needles: List[bytes],
+                   matches: Callable[[Dict[str, Any]], bool],
                    limit: int) -> List[ExecutionLogEntry]:
         """Query a single log file"""
-        results = []
-        
         try:
-            with open(file_path, 'r') as f:
-                for line in f:
-                    if len(results) >= limit:
-                        break
-                    
-                    try:
-                        data = json.loads(line.strip())
-                        
-                        # Apply filters
-                        if script_id and data.get('script_id') != script_id:
-                            continue
-                        if specialist and data.get('specialist') != specialist:
-                            continue
-                        if user and data.get('user') != user:
-                            continue
-                        if success is not None and data.get('success') != success:
-                            continue
-                        if level and data.get('level') != level.value:
-                            continue
-                        
-                        # Convert to ExecutionLogEntry
-                        data['level'] = LogLevel(data['level'])
-                        entry = ExecutionLogEntry(**data)
-                        results.append(entry)
-                        
-                    except (json.JSONDecodeError, KeyError, ValueError):
-                        # Skip malformed entries
-                        continue
+            with open(file_path, 'rb') as f:
+                return self._scan_lines(f, needles, matches, limit)
         
         except Exception as e:
             self.logger.error(f"Failed to query file {file_path}: {e}")
         
-        return results
+        return []
     
     def _query_compressed_file(self, file_path: Path, script_id: str, specialist: str,
-                             user: str, success: Optional[bool], level: Optional[LogLevel],
+                             needles: List[bytes],
+                             matches: Callable[[Dict[str, Any]], bool],
                              limit: int) -> List[ExecutionLogEntry]:
         """Query a compressed log file"""
-        results = []
-        
         try:
-            with gzip.open(file_path, 'rt') as f:
-                for line in f:
-                    if len(results) >= limit:
-                        break
-                    
-                    try:
-                        data = json.loads(line.strip())
-                        
-                        # Apply filters (same as _query_file)
-                        if script_id and data.get('script_id') != script_id:
-                            continue
-                        if specialist and data.get('specialist') != specialist:
-                            continue
-                        if user and data.get('user') != user:
-                            continue
-                        if success is not None and data.get('success') != success:
-                            continue
-                        if level and data.get('level') != level.value:
-                            continue
-                        
-                        # Convert to ExecutionLogEntry
-                        data['level'] = LogLevel(data['level'])
-                        entry = ExecutionLogEntry(**data)
-                        results.append(entry)
-                        
-                    except (json.JSONDecodeError, KeyError, ValueError):
-                        continue
+            offsets = self._indexed_offsets(file_path, script_id, specialist)
+            if offsets is not None:
+                # Only decompress the gzip members holding matching entries
+                results = []
+                with open(file_path, 'rb') as f:
+                    for offset in offsets:
+                        if len(results) >= limit:
+                            break
+                        lines = self._read_gzip_member(f, offset).splitlines()
+                        results.extend(self._scan_lines(
+                            lines, needles, matches, limit - len(results)
+                        ))
+                return results
+            
+            with gzip.open(file_path, 'rb') as f:
+                return self._scan_lines(f, needles, matches, limit)
         
         except Exception as e:
             self.logger.error(f"Failed to query compressed file {file_path}: {e}")
         
+        return []
+    
+    def _indexed_offsets(self, file_path: Path, script_id: str,
+                         specialist: str) -> Optional[List[int]]:
+        """Get member offsets matching the filters from a sidecar index
+        
+        Returns None when there is nothing to look up or no usable index,
+        in which case the whole file has to be scanned.
+        """
+        if not script_id and not specialist:
+            return None
+        
+        index_path = self._index_path(file_path)
+        if not index_path.exists():
+            return None
+        
+        try:
+            with open(index_path, 'r') as f:
+                index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        
+        offsets = None
+        for field, value in (('script_id', script_id), ('specialist', specialist)):
+            if value:
+                matches = set(index.get(field, {}).get(value, []))
+                offsets = matches if offsets is None else offsets & matches
+        
+        return sorted(offsets)
+    
+    def _read_gzip_member(self, f, offset: int) -> bytes:
+        """Decompress the single gzip member starting at offset"""
+        f.seek(offset)
+        decompressor = zlib.decompressobj(wbits=31)
+        chunks = []
+        
+        while not decompressor.eof:
+            data = f.read(64 * 1024)
+            if not data:
+                break
+            chunks.append(decompressor.decompress(data))
+        
+        return b''.join(chunks)
+    
+    def _line_needles(self, script_id: str, specialist: str, user: str,
+                      level: Optional[LogLevel]) -> List[bytes]:
+        """Get byte strings every matching raw log line must contain
+        
+        Each string filter value appears JSON-encoded in a matching line, so
+        lines missing it can be rejected without parsing them. Non-ASCII
+        values are skipped since their encoding depends on the serializer.
+        """
+        values = [script_id, specialist, user, level.value if level else None]
+        return [json.dumps(value).encode('ascii')
+                for value in values if value and value.isascii()]
+    
+    def _compile_filters(self, script_id: str, specialist: str, user: str,
+                         success: Optional[bool],
+                         level: Optional[LogLevel]) -> Callable[[Dict[str, Any]], bool]:
+        """Build a predicate that only tests the filters that were given"""
+        checks = []
+        if script_id:
+            checks.append(('script_id', script_id))
+        if specialist:
+            checks.append(('specialist', specialist))
+        if user:
+            checks.append(('user', user))
+        if success is not None:
+            checks.append(('success', success))
+        if level:
+            checks.append(('level', level.value))
+        
+        if not checks:
+            return lambda data: True
+        
+        if len(checks) == 1:
+            # Common point query: a single comparison per line
+            (field, value), = checks
+            return lambda data: data.get(field) == value
+        
+        return lambda data: all(data.get(field) == value for field, value in checks)
+    
+    def _scan_lines(self, lines, needles: List[bytes],
+                    matches: Callable[[Dict[str, Any]], bool],
+                    limit: int) -> List[ExecutionLogEntry]:
+        """Parse and filter raw JSON log lines"""
+        results = []
+        
+        for line in lines:
+            if len(results) >= limit:
+                break
+            
+            # Reject lines on a substring test before paying for the parse
+            if any(needle not in line for needle in needles):
+                continue
+            
+            try:
+                data = json.loads(line)
+                
+                # Apply filters
+                if not matches(data):
+                    continue
+                
+                # Convert to ExecutionLogEntry
+                data['level'] = LogLevel(data['level'])
+                entry = ExecutionLogEntry(**data)
+                results.append(entry)
+                
+            except (json.JSONDecodeError, KeyError, ValueError):
+                # Skip malformed entries
+                continue
+        
         return results
     
     def get_statistics(self,
@@ -429,10 +811,15 @@ class ExecutionLogger:
             'groups': {}
         }
         
-        # Group statistics
+        # Group statistics, resolving the group accessor once up front
+        if group_by in {f.name for f in fields(ExecutionLogEntry)}:
+            get_key = operator.attrgetter(group_by)
+        else:
+            get_key = lambda entry: 'unknown'
+        
         groups = {}
         for entry in entries:
-            key = getattr(entry, group_by, 'unknown')
+            key = get_key(entry)
             if key not in groups:
                 groups[key] = {
                     'count': 0,
@@ -460,10 +847,13 @@ class ExecutionLogger:
         return stats
     
     def shutdown(self):
-        """Shutdown the logger (for async mode)"""
+        """Shutdown the logger and close the log file"""
         if self.async_logging:
             self.log_queue.put(None)  # Signal to stop
             self.writer_thread.join(timeout=5)
+        
+        with self._write_lock:
+            self._close_log_fd()
 
 
 def main():
@@ -5,20 +5,54 @@ Collects and exports execution metrics in various formats
 """
 
 import json
+import math
 import time
 import socket
 import threading
 import datetime
+import weakref
+from array import array
+from bisect import bisect_left, bisect_right
 from pathlib import Path
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Iterator
+from dataclasses import dataclass, asdict
 from collections import defaultdict, deque
-import statistics
+from functools import lru_cache
+from itertools import accumulate
+
+
+# Number of independently locked stripes the recording state is split into
+NUM_SHARDS = 16
+
+# StatsD lines are packed into datagrams of at most this many bytes (fits
+# a typical MTU) and flushed at least this often (seconds)
+STATSD_MAX_BUFFER = 1400
+STATSD_FLUSH_INTERVAL = 0.1
+
+# Kernel send buffer requested for the StatsD socket, so bursts queue in
+# the kernel rather than being dropped by the non-blocking sends
+STATSD_SNDBUF_BYTES = 1 << 20
+
+# Number of most recent alerts kept
+MAX_ALERTS = 100
+
+# Summary percentiles exported as Prometheus quantiles
+PROMETHEUS_QUANTILES = (('p50', b'0.50'), ('p90', b'0.90'), ('p95', b'0.95'), ('p99', b'0.99'))
+
+# Histogram bucket upper bounds, log-spaced by 10% from 1e-4 to 1e4 so a
+# percentile read from a bucket is within 10% of the true value
+HISTOGRAM_BUCKET_BASE = 1.1
+HISTOGRAM_BUCKETS = tuple(
+    1e-4 * HISTOGRAM_BUCKET_BASE ** i
+    for i in range(math.ceil(math.log(1e8) / math.log(HISTOGRAM_BUCKET_BASE)) + 1)
+)
 
 
 @dataclass
 class Metric:
     """Individual metric data point"""
+    __slots__ = ('name', 'value', 'timestamp', 'tags', 'metric_type')
+    
     name: str
     value: float
     timestamp: float
@@ -26,6 +60,235 @@ class Metric:
     metric_type: str  # counter, gauge, histogram, summary
 
 
+@dataclass
+class Summary:
+    """Aggregated histogram values for one interval"""
+    __slots__ = ('count', 'sum', 'min', 'max', 'mean', 'p50', 'p90', 'p95', 'p99')
+    
+    count: int
+    sum: float
+    min: float
+    max: float
+    mean: float
+    p50: float
+    p90: float
+    p95: float
+    p99: float
+
+
+class _CounterCell:
+    """Counter whose increments never wait on a lock
+    
+    A shared read-add-store like ``cell[0] += value`` can lose updates
+    between threads. Each thread instead accumulates into its own slot,
+    keyed by thread id and only ever written by that thread, and readers
+    sum the slots. Nothing is queued, so there is nothing to flush.
+    """
+    
+    __slots__ = ('slots',)
+    
+    def __init__(self):
+        self.slots: Dict[int, float] = {}
+    
+    def add(self, value: float):
+        """Add to the calling thread's slot"""
+        slots = self.slots
+        ident = threading.get_ident()
+        slots[ident] = slots.get(ident, 0) + value
+    
+    def value(self) -> float:
+        """Get the current counter value"""
+        return sum(list(self.slots.values()))
+
+
+class _BucketedHistogram:
+    """Fixed-bucket histogram that records in O(log buckets)
+    
+    Values are counted into HISTOGRAM_BUCKETS (plus one overflow bucket)
+    instead of being kept, so memory stays constant and percentiles come
+    from a walk over the bucket counts. count, sum, min and max are exact.
+    """
+    
+    __slots__ = ('counts', 'count', 'sum', 'min', 'max')
+    
+    def __init__(self):
+        self.counts = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def record(self, value: float):
+        """Count a value into its bucket (caller holds the shard lock)"""
+        self.counts[bisect_left(HISTOGRAM_BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+    
+    def percentiles(self, ps: tuple) -> List[float]:
+        """Values at rank count * p for each of ``ps``
+        
+        Each is the upper bound of the bucket holding that rank, clamped to
+        the observed range. The bucket is selected by bisecting the running
+        bucket totals, so no Python-level walk over the buckets is needed.
+        """
+        cumulative = list(accumulate(self.counts))
+        overflow = len(HISTOGRAM_BUCKETS)
+        results = []
+        for p in ps:
+            i = bisect_right(cumulative, int(self.count * p))
+            if i == overflow:
+                results.append(self.max)
+            else:
+                results.append(max(self.min, min(HISTOGRAM_BUCKETS[i], self.max)))
+        return results
+    
+    def summary(self) -> Summary:
+        """Summarize the recorded values"""
+        count = self.count
+        p50, p90, p95, p99 = self.percentiles((0.5, 0.9, 0.95, 0.99))
+        return Summary(
+            count=count,
+            sum=self.sum,
+            min=self.min,
+            max=self.max,
+            mean=self.sum / count,
+            p50=p50,
+            p90=p90,
+            p95=p95,
+            p99=p99 if count > 100 else self.max
+        )
+
+
+class _Series:
+    """Fixed-size ring of aggregated samples for one metric series
+    
+    Timestamps and values are kept in parallel arrays rather than one dict
+    per sample, and the sample type is stored once for the whole series.
+    """
+    
+    __slots__ = ('type', 'timestamps', 'values', 'size', 'head')
+    
+    def __init__(self, capacity: int, type: str = 'summary'):
+        capacity = max(1, capacity)
+        self.type = type
+        self.timestamps = array('d', bytes(8 * capacity))
+        self.values: List[Any] = [None] * capacity
+        self.size = 0
+        self.head = 0  # Next slot to write
+    
+    def __len__(self) -> int:
+        return self.size
+    
+    def append(self, timestamp: float, value: Any):
+        """Add a sample, overwriting the oldest once full"""
+        head = self.head
+        self.timestamps[head] = timestamp
+        self.values[head] = value
+        self.head = (head + 1) % len(self.values)
+        if self.size < len(self.values):
+            self.size += 1
+    
+    def latest(self) -> Any:
+        """Get the most recent value (the series must not be empty)"""
+        return self.values[self.head - 1]
+
+
+class _MetricShard:
+    """One lock-striped slice of the collector's recording state
+    
+    The lock guards inserting new keys, the histograms and their dirty
+    set. Existing counter cells and gauge values are updated without it.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters: Dict[str, _CounterCell] = {}
+        self.gauges: Dict[str, float] = {}
+        self.histograms: Dict[str, _BucketedHistogram] = defaultdict(_BucketedHistogram)
+        self.dirty: set = set()  # Histogram keys recorded since the last aggregation
+
+
+class _SharedAggregator:
+    """Single background thread servicing every live MetricsCollector
+    
+    Collectors are held weakly, so one that is dropped without shutdown()
+    is simply forgotten. The thread sleeps until the earliest collector's
+    next due time and exits once no collectors remain.
+    """
+    
+    # Longest sleep between passes, so a late registration is not missed
+    MAX_SLEEP = 60.0
+    
+    def __init__(self):
+        self._collectors = weakref.WeakSet()
+        self._cond = threading.Condition()
+        self._thread = None
+    
+    def register(self, collector: 'MetricsCollector'):
+        """Start servicing a collector, starting the thread if needed"""
+        with self._cond:
+            self._collectors.add(collector)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True,
+                                                name='metrics-aggregator')
+                self._thread.start()
+            self._cond.notify()
+    
+    def wake(self):
+        """Wake the thread so it picks up a collector's changed schedule"""
+        with self._cond:
+            self._cond.notify()
+    
+    def unregister(self, collector: 'MetricsCollector'):
+        """Stop servicing a collector"""
+        with self._cond:
+            self._collectors.discard(collector)
+            self._cond.notify()
+    
+    def _run(self):
+        """Thread body: tick each collector, then sleep until the next is due"""
+        while True:
+            with self._cond:
+                collectors = list(self._collectors)
+                if not collectors:
+                    self._thread = None
+                    return
+            
+            # Schedules run on the monotonic clock so wall clock steps can't
+            # stall them or trigger a burst of catch-up passes
+            now = time.monotonic()
+            due = now + self.MAX_SLEEP
+            for collector in collectors:
+                try:
+                    due = min(due, collector._tick(now))
+                except Exception:
+                    # One failing collector must not stop the others
+                    pass
+            # Don't keep collectors alive while sleeping
+            del collectors, collector
+            
+            with self._cond:
+                self._cond.wait(max(0.0, due - time.monotonic()))
+
+
+_aggregator = _SharedAggregator()
+
+
+@lru_cache(maxsize=8192)
+def _exec_key(name: str, script_id: str, specialist: str, error_category: str = None) -> str:
+    """Metric key for a record_execution series, as _make_key would build it"""
+    if error_category is None:
+        return f"{name},script_id={script_id},specialist={specialist}"
+    return f"{name},error_category={error_category},script_id={script_id},specialist={specialist}"
+
+
 class MetricsCollector:
     """Collects and aggregates execution metrics"""
     
@@ -46,11 +309,23 @@ class MetricsCollector:
         self.retention_minutes = retention_minutes
         self.aggregation_interval = aggregation_interval
         
-        # Metrics storage
-        self.metrics = defaultdict(lambda: deque(maxlen=retention_minutes))
-        self.counters = defaultdict(int)
-        self.gauges = defaultdict(float)
-        self.histograms = defaultdict(list)
+        # Metrics storage. Counters, gauges and histograms are striped over
+        # shards keyed by metric key so concurrent recorders rarely contend;
+        # aggregated summary series stay under the collector-wide lock.
+        self.metrics: Dict[str, _Series] = defaultdict(lambda: _Series(retention_minutes))
+        self._shards = [_MetricShard() for _ in range(NUM_SHARDS)]
+        
+        # Execution outcomes per (script_id, specialist) and failures per
+        # error category, kept by record_execution so reports and alerts
+        # don't scan every tagged counter
+        self._exec_total: Dict[tuple, _CounterCell] = {}
+        self._exec_success: Dict[tuple, _CounterCell] = {}
+        self._exec_failure: Dict[tuple, _CounterCell] = {}
+        self._errors_by_category: Dict[str, _CounterCell] = {}
+        
+        # Encoded Prometheus (metric name, label string) per key; keys are never
+        # removed, so entries never go stale
+        self._prom_cache: Dict[str, tuple] = {}
         
         # Alert thresholds
         self.alert_thresholds = {
@@ -59,212 +334,411 @@ class MetricsCollector:
             'memory_peak_mb': 1024.0,  # Alert if peak memory exceeds 1GB
             'execution_rate_drop_percent': 50.0,  # Alert if execution rate drops by 50%
         }
-        self.alerts = []  # Active alerts
+        self.alerts = deque(maxlen=MAX_ALERTS)  # Active alerts, oldest dropped first
         self.alert_callbacks = []  # Functions to call on new alerts
         
         # StatsD configuration
         self.statsd_host = statsd_host
         self.statsd_port = statsd_port
-        self.statsd_socket = None
-        if self.statsd_host:
-            self.statsd_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.statsd_socket = None  # Created on first send
+        self._statsd_buf = bytearray()
+        self._statsd_buf_lock = threading.Lock()
+        self._statsd_prefix_cache: Dict[str, bytes] = {}
         
-        # Aggregation thread
-        self.running = True
-        self.aggregation_thread = threading.Thread(target=self._aggregation_loop, daemon=True)
-        self.aggregation_thread.start()
-        
-        # Lock for thread safety
+        # Lock for aggregated metrics and alerts
         self.lock = threading.Lock()
+        
+        # Background report snapshot, off until start_background_report()
+        self._report_interval = None
+        self._report_period_minutes = 60
+        self._next_report = None
+        self._cached_report = None
+        
+        # Periodic work runs on the aggregator thread shared by all collectors
+        self.running = True
+        self._next_aggregation = time.monotonic() + self.aggregation_interval
+        _aggregator.register(self)
     
-    def _aggregation_loop(self):
-        """Background thread for periodic aggregation"""
-        while self.running:
-            time.sleep(self.aggregation_interval)
+    def _tick(self, now: float) -> float:
+        """Run any periodic work that is due and return when it is next due
+        
+        Called from the shared aggregator thread; now and the returned due
+        time are time.monotonic() values.
+        """
+        if not self.running:
+            return now + self.aggregation_interval
+        
+        if self.statsd_host:
+            self._flush_statsd()
+        
+        if now >= self._next_aggregation:
             self._aggregate_metrics()
             self.check_alerts()  # Check for alerts after aggregation
+            # Skip passes missed while stalled rather than running them
+            # back to back, each re-alerting on the same totals
+            self._next_aggregation += self.aggregation_interval
+            if self._next_aggregation <= now:
+                self._next_aggregation = now + self.aggregation_interval
+        
+        due = self._next_aggregation
+        if self._report_interval is not None:
+            if now >= self._next_report:
+                self._refresh_cached_report()
+                self._next_report = now + self._report_interval
+            due = min(due, self._next_report)
+        
+        if self.statsd_host:
+            due = min(due, now + STATSD_FLUSH_INTERVAL)
+        return due
+    
+    def start_background_report(self, interval_s: float = 30, period_minutes: int = 60):
+        """Keep a report refreshed in the background
+        
+        The first snapshot is taken before returning; the shared aggregator
+        thread then refreshes it every interval_s seconds. Read it with
+        get_cached_report().
+        """
+        self._report_period_minutes = period_minutes
+        self._refresh_cached_report()
+        self._next_report = time.monotonic() + interval_s
+        self._report_interval = interval_s
+        _aggregator.wake()
+    
+    def _refresh_cached_report(self):
+        """Recompute the cached report"""
+        # The snapshot is swapped in with a single assignment, so readers
+        # never see a partial one
+        self._cached_report = self.generate_report(self._report_period_minutes)
+    
+    def get_cached_report(self) -> Dict[str, Any]:
+        """Get the latest background report, generating one if there is none"""
+        report = self._cached_report
+        if report is None:
+            report = self.generate_report(self._report_period_minutes)
+        return report
     
     def _aggregate_metrics(self):
         """Aggregate histogram metrics into summaries"""
-        with self.lock:
-            current_time = time.time()
+        current_time = time.time()
+        
+        # Take each shard's pending histograms in turn, starting fresh ones
+        # for the next interval, so recorders on other shards are never blocked
+        pending = {}
+        for shard in self._shards:
+            if not shard.dirty:
+                # Nothing recorded here since the last pass; skip the lock
+                continue
             
-            # Process histograms
-            for key, values in list(self.histograms.items()):
-                if not values:
-                    continue
-                
-                # Calculate percentiles
-                sorted_values = sorted(values)
-                count = len(values)
-                
-                summary = {
-                    'count': count,
-                    'sum': sum(values),
-                    'min': sorted_values[0],
-                    'max': sorted_values[-1],
-                    'mean': statistics.mean(values),
-                    'p50': sorted_values[int(count * 0.5)],
-                    'p90': sorted_values[int(count * 0.9)],
-                    'p95': sorted_values[int(count * 0.95)],
-                    'p99': sorted_values[int(count * 0.99)] if count > 100 else sorted_values[-1]
-                }
-                
+            with shard.lock:
+                dirty, shard.dirty = shard.dirty, set()
+                for key in dirty:
+                    pending[key] = shard.histograms[key]
+                    shard.histograms[key] = _BucketedHistogram()
+        
+        if not pending:
+            return
+        
+        summaries = {key: histogram.summary() for key, histogram in pending.items()}
+        
+        with self.lock:
+            for key, summary in summaries.items():
                 # Store summary
                 metric_name = f"{key}_summary"
-                self.metrics[metric_name].append({
-                    'timestamp': current_time,
-                    'value': summary,
-                    'type': 'summary'
-                })
-                
-                # Clear histogram for next interval
-                self.histograms[key] = []
+                self.metrics[metric_name].append(current_time, summary)
     
     def increment_counter(self, name: str, value: float = 1.0, tags: Dict[str, str] = None):
         """Increment a counter metric"""
-        with self.lock:
-            key = self._make_key(name, tags)
-            self.counters[key] += value
-            
-            # Send to StatsD if configured
-            if self.statsd_socket:
-                self._send_statsd(f"{key}:{value}|c")
+        key = self._make_key(name, tags)
+        self._increment_counter_by_key(key, value, name, tags)
+    
+    def _increment_counter_by_key(self, key: str, value: float = 1.0,
+                                  name: str = None, tags: Dict[str, str] = None):
+        """Increment a counter whose key is already built
+        
+        When name is omitted, the Prometheus series for a new key is parsed
+        from the key on first export instead.
+        """
+        shard = self._shard_for(key)
+        cell = shard.counters.get(key)
+        if cell is None:
+            # Only a brand-new key needs the shard lock
+            with shard.lock:
+                cell = shard.counters.setdefault(key, _CounterCell())
+            if name is not None:
+                self._cache_prom_series(key, name, tags)
+        cell.add(value)
+        
+        # Send to StatsD if configured
+        if self.statsd_host:
+            self._send_statsd(key, value, b"|c")
     
     def set_gauge(self, name: str, value: float, tags: Dict[str, str] = None):
         """Set a gauge metric"""
-        with self.lock:
-            key = self._make_key(name, tags)
-            self.gauges[key] = value
-            
-            # Send to StatsD if configured
-            if self.statsd_socket:
-                self._send_statsd(f"{key}:{value}|g")
+        key = self._make_key(name, tags)
+        shard = self._shard_for(key)
+        if key in shard.gauges:
+            # Replacing a value is a single atomic store
+            shard.gauges[key] = value
+        else:
+            with shard.lock:
+                shard.gauges[key] = value
+            self._cache_prom_series(key, name, tags)
+        
+        # Send to StatsD if configured
+        if self.statsd_host:
+            self._send_statsd(key, value, b"|g")
     
     def record_histogram(self, name: str, value: float, tags: Dict[str, str] = None):
         """Record a value in a histogram"""
-        with self.lock:
-            key = self._make_key(name, tags)
-            self.histograms[key].append(value)
-            
-            # Send to StatsD if configured  
-            if self.statsd_socket:
-                self._send_statsd(f"{key}:{value}|h")
+        self._record_histogram_by_key(self._make_key(name, tags), value)
+    
+    def _record_histogram_by_key(self, key: str, value: float):
+        """Record a histogram value whose key is already built"""
+        shard = self._shard_for(key)
+        with shard.lock:
+            shard.histograms[key].record(value)
+            shard.dirty.add(key)
+        
+        # Send to StatsD if configured, outside the shard lock
+        if self.statsd_host:
+            self._send_statsd(key, value, b"|h")
     
     def record_execution(self, script_id: str, specialist: str, result: Any):
         """Record metrics from a script execution result"""
+        series = (script_id, specialist)
+        
         # Basic execution counter
-        self.increment_counter('metaclaude.executions.total', tags={
-            'script_id': script_id,
-            'specialist': specialist
-        })
+        self._add_to(self._exec_total, series)
+        self._increment_counter_by_key(
+            _exec_key('metaclaude.executions.total', script_id, specialist))
         
         # Success/failure counters
         if result.success:
-            self.increment_counter('metaclaude.executions.success', tags={
-                'script_id': script_id,
-                'specialist': specialist
-            })
+            self._add_to(self._exec_success, series)
+            self._increment_counter_by_key(
+                _exec_key('metaclaude.executions.success', script_id, specialist))
         else:
             error_category = 'unknown'
             if result.error_details:
                 error_category = result.error_details.category.value
             
-            self.increment_counter('metaclaude.executions.failure', tags={
-                'script_id': script_id,
-                'specialist': specialist,
-                'error_category': error_category
-            })
+            self._add_to(self._exec_failure, series)
+            self._add_to(self._errors_by_category, error_category)
+            self._increment_counter_by_key(
+                _exec_key('metaclaude.executions.failure', script_id, specialist, error_category))
         
         # Duration histogram
-        self.record_histogram('metaclaude.execution.duration_seconds', 
-                            result.execution_time,
-                            tags={
-                                'script_id': script_id,
-                                'specialist': specialist
-                            })
+        self._record_histogram_by_key(
+            _exec_key('metaclaude.execution.duration_seconds', script_id, specialist),
+            result.execution_time)
         
         # Resource usage metrics
         if result.resource_usage:
-            self.record_histogram('metaclaude.resource.memory_peak_mb',
-                                result.resource_usage.peak_memory_mb,
-                                tags={
-                                    'script_id': script_id,
-                                    'specialist': specialist
-                                })
+            self._record_histogram_by_key(
+                _exec_key('metaclaude.resource.memory_peak_mb', script_id, specialist),
+                result.resource_usage.peak_memory_mb)
             
-            self.record_histogram('metaclaude.resource.cpu_time_seconds',
-                                result.resource_usage.cpu_time_seconds,
-                                tags={
-                                    'script_id': script_id,
-                                    'specialist': specialist
-                                })
+            self._record_histogram_by_key(
+                _exec_key('metaclaude.resource.cpu_time_seconds', script_id, specialist),
+                result.resource_usage.cpu_time_seconds)
         
         # Retry metrics
         if result.retry_count > 0:
-            self.increment_counter('metaclaude.executions.retries', 
-                                 value=result.retry_count,
-                                 tags={
-                                     'script_id': script_id,
-                                     'specialist': specialist
-                                 })
+            self._increment_counter_by_key(
+                _exec_key('metaclaude.executions.retries', script_id, specialist),
+                result.retry_count)
+    
+    @staticmethod
+    def _add_to(cells: Dict[Any, _CounterCell], key: Any, value: float = 1.0):
+        """Add to the counter cell for a key in a typed tally"""
+        cell = cells.get(key)
+        if cell is None:
+            cell = cells.setdefault(key, _CounterCell())
+        cell.add(value)
+    
+    @staticmethod
+    def _sum_cells(cells: Dict[Any, _CounterCell]) -> float:
+        """Total of every counter cell in a typed tally"""
+        return sum(cell.value() for cell in list(cells.values()))
+    
+    def _shard_for(self, key: str) -> _MetricShard:
+        """Get the shard owning a metric key"""
+        return self._shards[hash(key) % NUM_SHARDS]
+    
+    def _collect(self, kind: str) -> Dict[str, Any]:
+        """Merge one kind of per-shard state (e.g. 'gauges') into a snapshot"""
+        merged = {}
+        for shard in self._shards:
+            with shard.lock:
+                merged.update(getattr(shard, kind))
+        return merged
+    
+    def _collect_counters(self) -> Dict[str, float]:
+        """Snapshot the current value of every counter"""
+        cells = []
+        for shard in self._shards:
+            with shard.lock:
+                cells.extend(shard.counters.items())
+        return {key: cell.value() for key, cell in cells}
     
     def _make_key(self, name: str, tags: Dict[str, str] = None) -> str:
         """Create metric key from name and tags"""
         if not tags:
             return name
         
-        tag_str = ','.join(f"{k}={v}" for k, v in sorted(tags.items()))
-        return f"{name},{tag_str}"
-    
-    def _send_statsd(self, message: str):
-        """Send metric to StatsD server"""
-        if self.statsd_socket and self.statsd_host:
-            try:
-                self.statsd_socket.sendto(
-                    message.encode('utf-8'),
-                    (self.statsd_host, self.statsd_port)
-                )
-            except Exception:
-                # Silently ignore StatsD errors
-                pass
+        if len(tags) == 2:
+            # Common script_id/specialist case: no intermediate list or join
+            a, b = sorted(tags)
+            return f"{name},{a}={tags[a]},{b}={tags[b]}"
+        
+        return name + ',' + ','.join([f"{k}={tags[k]}" for k in sorted(tags)])
+    
+    def _send_statsd(self, key: str, value: float, suffix: bytes):
+        """Queue a metric for the StatsD server
+        
+        Lines are packed into one datagram until it would exceed
+        STATSD_MAX_BUFFER bytes, then sent with a single sendto. The
+        ``key:`` prefix is encoded once per key and reused.
+        """
+        if not self.statsd_host:
+            return
+        
+        prefix = self._statsd_prefix_cache.get(key)
+        if prefix is None:
+            prefix = self._statsd_prefix_cache.setdefault(key, f"{key}:".encode('utf-8'))
+        data = str(value).encode('ascii')
+        size = len(prefix) + len(data) + len(suffix)
+        payload = None
+        with self._statsd_buf_lock:
+            buf = self._statsd_buf
+            if buf and len(buf) + 1 + size > STATSD_MAX_BUFFER:
+                payload = bytes(buf)
+                del buf[:]
+            if buf:
+                buf += b'\n'
+            buf += prefix
+            buf += data
+            buf += suffix
+        
+        if payload:
+            self._sendto_statsd(payload)
+    
+    def _flush_statsd(self):
+        """Send any buffered StatsD lines"""
+        with self._statsd_buf_lock:
+            if not self._statsd_buf:
+                return
+            payload = bytes(self._statsd_buf)
+            del self._statsd_buf[:]
+        
+        self._sendto_statsd(payload)
+    
+    def _statsd_sock(self) -> socket.socket:
+        """Get the StatsD socket, creating it on first use
+        
+        Double-checked so the buffer lock is only taken while the socket
+        doesn't exist yet.
+        """
+        sock = self.statsd_socket
+        if sock is None:
+            with self._statsd_buf_lock:
+                if self.statsd_socket is None:
+                    self.statsd_socket = self._create_statsd_socket()
+                sock = self.statsd_socket
+        return sock
+    
+    def _create_statsd_socket(self) -> socket.socket:
+        """Create the non-blocking UDP socket used for StatsD"""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, STATSD_SNDBUF_BYTES)
+        except OSError:
+            # Keep the system default buffer size
+            pass
+        return sock
+    
+    def _sendto_statsd(self, payload: bytes):
+        """Send one datagram to the StatsD server (never under a lock)
+        
+        The socket is non-blocking, so a full send buffer drops the datagram
+        instead of stalling the recording or aggregator thread.
+        """
+        try:
+            self._statsd_sock().sendto(payload, (self.statsd_host, self.statsd_port))
+        except BlockingIOError:
+            # Send buffer full; metrics are best-effort
+            pass
+        except Exception:
+            # Silently ignore StatsD errors
+            pass
     
     def export_prometheus(self) -> str:
         """Export metrics in Prometheus format"""
-        lines = []
+        return b'\n'.join(self._prometheus_lines()).decode('utf-8')
+    
+    def iter_export_prometheus(self) -> Iterator[str]:
+        """Export metrics in Prometheus format one line at a time
+        
+        The metrics are read when this is called; lines are only formatted
+        as they are consumed, so a caller can stop early without building
+        the whole export.
+        """
+        return (line.decode('utf-8') for line in self._prometheus_lines())
+    
+    def _prometheus_lines(self) -> Iterator[bytes]:
+        """Snapshot the metrics and get a generator of encoded Prometheus lines"""
         timestamp = int(time.time() * 1000)
+        counters = self._collect_counters()
+        gauges = self._collect('gauges')
+        summaries = self._latest_summaries()
+        return self._format_prometheus(b' %d' % timestamp, counters, gauges, summaries)
+    
+    def _format_prometheus(self, ts: bytes, counters: Dict[str, float],
+                           gauges: Dict[str, float],
+                           summaries: Dict[str, Summary]) -> Iterator[bytes]:
+        """Format a metrics snapshot as Prometheus lines
         
-        with self.lock:
-            # Export counters
-            for key, value in self.counters.items():
-                metric_name, tags = self._parse_key(key)
-                labels = self._format_prometheus_labels(tags)
-                lines.append(f"{metric_name}_total{labels} {value} {timestamp}")
+        Runs outside the lock so aggregation and alerting aren't held up.
+        """
+        # Export counters
+        for key, value in counters.items():
+            metric_name, labels = self._prom_series(key)
+            yield b'%s_total%s %a%s' % (metric_name, labels, value, ts)
+        
+        # Export gauges
+        for key, value in gauges.items():
+            metric_name, labels = self._prom_series(key)
+            yield b'%s%s %a%s' % (metric_name, labels, value, ts)
+        
+        # Export summaries from aggregated metrics
+        for key, summary in summaries.items():
+            metric_name, labels = self._prom_series(key.replace('_summary', ''))
             
-            # Export gauges
-            for key, value in self.gauges.items():
-                metric_name, tags = self._parse_key(key)
-                labels = self._format_prometheus_labels(tags)
-                lines.append(f"{metric_name}{labels} {value} {timestamp}")
+            yield b'%s_count%s %a%s' % (metric_name, labels, summary.count, ts)
+            yield b'%s_sum%s %a%s' % (metric_name, labels, summary.sum, ts)
+            yield b'%s_min%s %a%s' % (metric_name, labels, summary.min, ts)
+            yield b'%s_max%s %a%s' % (metric_name, labels, summary.max, ts)
             
-            # Export summaries from aggregated metrics
-            for key, values in self.metrics.items():
-                if values and values[-1].get('type') == 'summary':
-                    metric_name, tags = self._parse_key(key.replace('_summary', ''))
-                    labels = self._format_prometheus_labels(tags)
-                    summary = values[-1]['value']
-                    
-                    lines.append(f"{metric_name}_count{labels} {summary['count']} {timestamp}")
-                    lines.append(f"{metric_name}_sum{labels} {summary['sum']} {timestamp}")
-                    lines.append(f"{metric_name}_min{labels} {summary['min']} {timestamp}")
-                    lines.append(f"{metric_name}_max{labels} {summary['max']} {timestamp}")
-                    
-                    for percentile in ['p50', 'p90', 'p95', 'p99']:
-                        if percentile in summary:
-                            quantile = percentile[1:] 
-                            lines.append(f"{metric_name}{{quantile=\"0.{quantile}\"{labels[:-1]}}} {summary[percentile]} {timestamp}")
-        
-        return '\n'.join(lines)
+            # The quantile label joins the series labels inside one brace pair
+            rest = b',' + labels[1:] if labels else b'}'
+            for percentile, quantile in PROMETHEUS_QUANTILES:
+                yield b'%s{quantile="%s"%s %a%s' % (
+                    metric_name, quantile, rest, getattr(summary, percentile), ts)
+    
+    def _prom_series(self, key: str) -> tuple:
+        """Get the cached, encoded Prometheus metric name and labels for a key"""
+        series = self._prom_cache.get(key)
+        if series is None:
+            series = self._cache_prom_series(key, *self._parse_key(key))
+        return series
+    
+    def _cache_prom_series(self, key: str, name: str, tags: Optional[Dict[str, str]]) -> tuple:
+        """Encode and cache the Prometheus metric name and labels for a key"""
+        return self._prom_cache.setdefault(key, (
+            name.encode('utf-8'),
+            self._format_prometheus_labels(tags).encode('utf-8')
+        ))
     
     def _parse_key(self, key: str) -> tuple:
         """Parse metric key into name and tags"""
@@ -290,18 +764,46 @@ class MetricsCollector:
     
     def get_current_metrics(self) -> Dict[str, Any]:
         """Get current metric values"""
+        counters = self._collect_counters()
+        gauges = self._collect('gauges')
+        histogram_counts = {}
+        for shard in self._shards:
+            with shard.lock:
+                histogram_counts.update((k, len(v)) for k, v in shard.histograms.items())
+        
+        return {
+            'counters': counters,
+            'gauges': gauges,
+            'histogram_counts': histogram_counts,
+            'summaries': {
+                key: asdict(summary) for key, summary in self._latest_summaries().items()
+            }
+        }
+    
+    def _latest_summaries(self) -> Dict[str, Summary]:
+        """Snapshot the latest summary of each aggregated series
+        
+        Only the copy is made under the collector lock; callers analyse the
+        snapshot without holding up aggregation or other readers.
+        """
         with self.lock:
             return {
-                'counters': dict(self.counters),
-                'gauges': dict(self.gauges),
-                'histogram_counts': {k: len(v) for k, v in self.histograms.items()},
-                'summaries': {
-                    k: v[-1]['value'] if v else None 
-                    for k, v in self.metrics.items() 
-                    if k.endswith('_summary')
-                }
+                key: series.latest()
+                for key, series in self.metrics.items()
+                if series and series.type == 'summary'
             }
     
+    def _summaries_for(self, summaries: Dict[str, Summary], metric: str):
+        """Yield (specialist, summary) for series of a histogram metric
+        
+        The metric is matched against the end of the series' metric name,
+        so tagged series match as well as untagged ones.
+        """
+        for key, summary in summaries.items():
+            name, tags = self._parse_key(key[:-len('_summary')])
+            if name.endswith(metric):
+                yield tags.get('specialist', 'unknown'), summary
+    
     def generate_report(self, period_minutes: int = 60) -> Dict[str, Any]:
         """Generate a metrics report for the specified period"""
         cutoff_time = time.time() - (period_minutes * 60)
@@ -314,88 +816,54 @@ class MetricsCollector:
             'resource_usage': {}
         }
         
-        with self.lock:
-            # Execution statistics
-            total_executions = 0
-            successful_executions = 0
-            failed_executions = 0
-            
-            for key, value in self.counters.items():
-                if 'executions.total' in key:
-                    total_executions += value
-                elif 'executions.success' in key:
-                    successful_executions += value
-                elif 'executions.failure' in key:
-                    failed_executions += value
-            
-            report['execution_stats'] = {
-                'total': total_executions,
-                'successful': successful_executions,
-                'failed': failed_executions,
-                'success_rate': successful_executions / total_executions if total_executions > 0 else 0
+        # Execution statistics
+        total_executions = self._sum_cells(self._exec_total)
+        successful_executions = self._sum_cells(self._exec_success)
+        failed_executions = self._sum_cells(self._exec_failure)
+        
+        report['execution_stats'] = {
+            'total': total_executions,
+            'successful': successful_executions,
+            'failed': failed_executions,
+            'success_rate': successful_executions / total_executions if total_executions > 0 else 0
+        }
+        
+        # Error analysis
+        report['error_analysis'] = {
+            category: cell.value() for category, cell in list(self._errors_by_category.items())
+        }
+        
+        summaries = self._latest_summaries()
+        
+        # Performance statistics from summaries (the last series per
+        # specialist wins)
+        duration_summaries = dict(self._summaries_for(summaries, 'duration_seconds'))
+        for specialist, latest in duration_summaries.items():
+            report['performance_stats'][specialist] = {
+                'avg_duration': latest.mean,
+                'p50_duration': latest.p50,
+                'p95_duration': latest.p95,
+                'max_duration': latest.max
             }
+        
+        # Resource usage statistics
+        memory_summaries = dict(self._summaries_for(summaries, 'memory_peak_mb'))
+        cpu_summaries = dict(self._summaries_for(summaries, 'cpu_time_seconds'))
+        
+        for specialist in set(list(memory_summaries.keys()) + list(cpu_summaries.keys())):
+            report['resource_usage'][specialist] = {}
             
-            # Performance statistics from summaries
-            duration_summaries = {}
-            for key, values in self.metrics.items():
-                if 'duration_seconds_summary' in key and values:
-                    _, tags = self._parse_key(key.replace('_summary', ''))
-                    specialist = tags.get('specialist', 'unknown')
-                    
-                    if specialist not in duration_summaries:
-                        duration_summaries[specialist] = []
-                    
-                    duration_summaries[specialist].append(values[-1]['value'])
-            
-            for specialist, summaries in duration_summaries.items():
-                if summaries:
-                    latest = summaries[-1]
-                    report['performance_stats'][specialist] = {
-                        'avg_duration': latest['mean'],
-                        'p50_duration': latest['p50'],
-                        'p95_duration': latest['p95'],
-                        'max_duration': latest['max']
-                    }
-            
-            # Error analysis
-            error_counts = defaultdict(int)
-            for key, value in self.counters.items():
-                if 'executions.failure' in key:
-                    _, tags = self._parse_key(key)
-                    error_category = tags.get('error_category', 'unknown')
-                    error_counts[error_category] += value
-            
-            report['error_analysis'] = dict(error_counts)
-            
-            # Resource usage statistics
-            memory_summaries = {}
-            cpu_summaries = {}
-            
-            for key, values in self.metrics.items():
-                if 'memory_peak_mb_summary' in key and values:
-                    _, tags = self._parse_key(key.replace('_summary', ''))
-                    specialist = tags.get('specialist', 'unknown')
-                    memory_summaries[specialist] = values[-1]['value']
-                
-                elif 'cpu_time_seconds_summary' in key and values:
-                    _, tags = self._parse_key(key.replace('_summary', ''))
-                    specialist = tags.get('specialist', 'unknown')
-                    cpu_summaries[specialist] = values[-1]['value']
+            if specialist in memory_summaries:
+                report['resource_usage'][specialist]['memory'] = {
+                    'avg_peak_mb': memory_summaries[specialist].mean,
+                    'max_peak_mb': memory_summaries[specialist].max
+                }
             
-            for specialist in set(list(memory_summaries.keys()) + list(cpu_summaries.keys())):
-                report['resource_usage'][specialist] = {}
-                
-                if specialist in memory_summaries:
-                    report['resource_usage'][specialist]['memory'] = {
-                        'avg_peak_mb': memory_summaries[specialist]['mean'],
-                        'max_peak_mb': memory_summaries[specialist]['max']
-                    }
-                
-                if specialist in cpu_summaries:
-                    report['resource_usage'][specialist]['cpu'] = {
-                        'avg_cpu_seconds': cpu_summaries[specialist]['mean'],
-                        'max_cpu_seconds': cpu_summaries[specialist]['max']
-                    }
+            if specialist in cpu_summaries:
+                report['resource_usage'][specialist]['cpu'] = {
+                    'avg_cpu_seconds': cpu_summaries[specialist].mean,
+                    'max_cpu_seconds': cpu_summaries[specialist].max
+                }
         
         return report
     
@@ -404,69 +872,60 @@ class MetricsCollector:
         new_alerts = []
         current_time = datetime.datetime.now()
         
-        with self.lock:
-            # Check error rate
-            total_executions = sum(v for k, v in self.counters.items() if 'executions.total' in k)
-            failed_executions = sum(v for k, v in self.counters.items() if 'executions.failure' in k)
-            
-            if total_executions > 0:
-                error_rate = (failed_executions / total_executions) * 100
-                if error_rate > self.alert_thresholds['error_rate_percent']:
-                    alert = {
-                        'timestamp': current_time.isoformat(),
-                        'type': 'error_rate_high',
-                        'severity': 'warning' if error_rate < 25 else 'critical',
-                        'message': f'Error rate is {error_rate:.1f}% (threshold: {self.alert_thresholds["error_rate_percent"]}%)',
-                        'value': error_rate,
-                        'threshold': self.alert_thresholds['error_rate_percent']
-                    }
-                    new_alerts.append(alert)
+        # Check error rate
+        total_executions = self._sum_cells(self._exec_total)
+        failed_executions = self._sum_cells(self._exec_failure)
+        
+        if total_executions > 0:
+            error_rate = (failed_executions / total_executions) * 100
+            if error_rate > self.alert_thresholds['error_rate_percent']:
+                alert = {
+                    'timestamp': current_time.isoformat(),
+                    'type': 'error_rate_high',
+                    'severity': 'warning' if error_rate < 25 else 'critical',
+                    'message': f'Error rate is {error_rate:.1f}% (threshold: {self.alert_thresholds["error_rate_percent"]}%)',
+                    'value': error_rate,
+                    'threshold': self.alert_thresholds['error_rate_percent']
+                }
+                new_alerts.append(alert)
+        
+        summaries = self._latest_summaries()
+        
+        # Check p95 duration for each specialist
+        for specialist, latest_summary in self._summaries_for(summaries, 'duration_seconds'):
+            p95 = latest_summary.p95
             
-            # Check p95 duration for each specialist
-            for key, values in self.metrics.items():
-                if 'duration_seconds_summary' in key and values:
-                    _, tags = self._parse_key(key.replace('_summary', ''))
-                    specialist = tags.get('specialist', 'unknown')
-                    latest_summary = values[-1]['value']
-                    p95 = latest_summary.get('p95', 0)
-                    
-                    if p95 > self.alert_thresholds['p95_duration_seconds']:
-                        alert = {
-                            'timestamp': current_time.isoformat(),
-                            'type': 'duration_high',
-                            'severity': 'warning',
-                            'message': f'{specialist} p95 duration is {p95:.1f}s (threshold: {self.alert_thresholds["p95_duration_seconds"]}s)',
-                            'value': p95,
-                            'threshold': self.alert_thresholds['p95_duration_seconds'],
-                            'specialist': specialist
-                        }
-                        new_alerts.append(alert)
+            if p95 > self.alert_thresholds['p95_duration_seconds']:
+                alert = {
+                    'timestamp': current_time.isoformat(),
+                    'type': 'duration_high',
+                    'severity': 'warning',
+                    'message': f'{specialist} p95 duration is {p95:.1f}s (threshold: {self.alert_thresholds["p95_duration_seconds"]}s)',
+                    'value': p95,
+                    'threshold': self.alert_thresholds['p95_duration_seconds'],
+                    'specialist': specialist
+                }
+                new_alerts.append(alert)
+        
+        # Check memory usage
+        for specialist, latest_summary in self._summaries_for(summaries, 'memory_peak_mb'):
+            max_memory = latest_summary.max
             
-            # Check memory usage
-            for key, values in self.metrics.items():
-                if 'memory_peak_mb_summary' in key and values:
-                    _, tags = self._parse_key(key.replace('_summary', ''))
-                    specialist = tags.get('specialist', 'unknown')
-                    latest_summary = values[-1]['value']
-                    max_memory = latest_summary.get('max', 0)
-                    
-                    if max_memory > self.alert_thresholds['memory_peak_mb']:
-                        alert = {
-                            'timestamp': current_time.isoformat(),
-                            'type': 'memory_high',
-                            'severity': 'warning' if max_memory < 2048 else 'critical',
-                            'message': f'{specialist} peak memory is {max_memory:.1f}MB (threshold: {self.alert_thresholds["memory_peak_mb"]}MB)',
-                            'value': max_memory,
-                            'threshold': self.alert_thresholds['memory_peak_mb'],
-                            'specialist': specialist
-                        }
-                        new_alerts.append(alert)
+            if max_memory > self.alert_thresholds['memory_peak_mb']:
+                alert = {
+                    'timestamp': current_time.isoformat(),
+                    'type': 'memory_high',
+                    'severity': 'warning' if max_memory < 2048 else 'critical',
+                    'message': f'{specialist} peak memory is {max_memory:.1f}MB (threshold: {self.alert_thresholds["memory_peak_mb"]}MB)',
+                    'value': max_memory,
+                    'threshold': self.alert_thresholds['memory_peak_mb'],
+                    'specialist': specialist
+                }
+                new_alerts.append(alert)
         
         # Store new alerts and trigger callbacks
         if new_alerts:
             self.alerts.extend(new_alerts)
-            # Keep only last 100 alerts
-            self.alerts = self.alerts[-100:]
             
             # Trigger callbacks
             for callback in self.alert_callbacks:
@@ -488,17 +947,22 @@ class MetricsCollector:
     
     def get_alerts(self, since: datetime.datetime = None) -> List[Dict[str, Any]]:
         """Get alerts since specified time"""
+        # list() copies the deque in one step, so a concurrent check_alerts
+        # can't mutate it mid-iteration
+        alerts = list(self.alerts)
         if since is None:
-            return self.alerts.copy()
+            return alerts
         
         since_iso = since.isoformat()
-        return [a for a in self.alerts if a['timestamp'] >= since_iso]
+        return [a for a in alerts if a['timestamp'] >= since_iso]
     
     def shutdown(self):
         """Shutdown the metrics collector"""
         self.running = False
-        self.aggregation_thread.join(timeout=5)
+        _aggregator.unregister(self)
         
+        if self.statsd_host:
+            self._flush_statsd()
         if self.statsd_socket:
             self.statsd_socket.close()
 
@@ -3,20 +3,36 @@
 Test script to demonstrate monitoring capabilities
 """
 
+import io
 import sys
-import time
 import json
+import threading
 import importlib.util
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
 from pathlib import Path
 
-# Add parent directories to path for imports
-sys.path.insert(0, str(Path(__file__).parent.parent))
+# Faster JSON serialization when available
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # Load module with hyphen in name
 def load_module(name, path):
+    # Reuse a module already loaded in this process instead of re-executing it
+    if name in sys.modules:
+        return sys.modules[name]
+    
     spec = importlib.util.spec_from_file_location(name, path)
     module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
     return module
 
 # Load monitoring integration
@@ -25,6 +41,9 @@ monitoring_integration = load_module('monitoring_integration',
                                    base_dir / 'core' / 'monitoring-integration.py')
 MonitoredToolExecutionService = monitoring_integration.MonitoredToolExecutionService
 
+# Session shared by all test executions
+SESSION_ID = 'test-session'
+
 
 def test_monitoring():
     """Test and demonstrate monitoring features"""
@@ -41,18 +60,31 @@ def test_monitoring():
     )
     print("   ✓ TES initialized with monitoring enabled")
     
-    # Set up alert callback to show alerts in real-time
+    # echo.sh only echoes its argument, so run it in-process instead of bash
+    tes.register_builtin_handler('echo_test', lambda args: f"Echo: {args['message']}\n")
+    
+    # Monitoring components, None when disabled
+    metrics = getattr(tes, 'metrics', None)
+    logger = getattr(tes, 'logger', None)
+    
+    # Set up alert callback to show alerts in real-time. It runs on the
+    # metrics aggregator thread, so guard the shared list.
     alerts_received = []
+    alerts_lock = threading.Lock()
+    output_lock = threading.Lock()
     def alert_callback(alerts):
-        for alert in alerts:
-            print(f"\n   🚨 ALERT: {alert['message']}")
-            alerts_received.append(alert)
+        text = ''.join(f"\n   🚨 ALERT: {alert['message']}\n" for alert in alerts)
+        with output_lock:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+        with alerts_lock:
+            alerts_received.extend(alerts)
     
-    if hasattr(tes, 'metrics'):
-        tes.metrics.register_alert_callback(alert_callback)
+    if metrics is not None:
+        metrics.register_alert_callback(alert_callback)
         # Set lower thresholds for testing
-        tes.metrics.set_alert_threshold('error_rate_percent', 5.0)
-        tes.metrics.set_alert_threshold('p95_duration_seconds', 0.1)
+        metrics.set_alert_threshold('error_rate_percent', 5.0)
+        metrics.set_alert_threshold('p95_duration_seconds', 0.1)
     
     # Test scenarios
     test_cases = [
@@ -83,45 +115,70 @@ def test_monitoring():
     ]
     
     print("\n2. Running test executions...")
+    num_cases = len(test_cases)
+    correlation_ids = tuple(f'test-{i}' for i in range(1, num_cases + 1))
     
-    for i, test in enumerate(test_cases, 1):
-        print(f"\n   Test {i}: {test['name']}")
-        print(f"   Script: {test['script_id']}")
-        print(f"   Args: {test['args']}")
-        
-        # Execute
-        result = tes.execute(
-            test['script_id'],
-            test['args'],
-            session_id='test-session',
-            correlation_id=f'test-{i}'
-        )
+    # The cases are independent, so run them all at once and report each
+    # as it finishes
+    with ThreadPoolExecutor(max_workers=num_cases) as pool:
+        futures = {}
+        for i, test in enumerate(test_cases, 1):
+            name, script_id, args = test['name'], test['script_id'], test['args']
+            future = pool.submit(
+                tes.execute,
+                script_id,
+                args,
+                session_id=SESSION_ID,
+                correlation_id=correlation_ids[i - 1]
+            )
+            futures[future] = (i, name, script_id, args)
         
-        # Show results
-        if result.success:
-            print(f"   ✓ Success! Duration: {result.execution_time:.3f}s")
-            if result.outputs:
-                print(f"   Outputs: {result.outputs}")
-        else:
-            print(f"   ✗ Failed: {result.error}")
-            if result.error_details:
-                print(f"   Category: {result.error_details.category.value}")
-                print(f"   Suggestions:")
-                for suggestion in result.error_details.suggestions[:2]:
-                    print(f"     - {suggestion}")
-        
-        # Show resource usage if available
-        if result.resource_usage:
-            print(f"   Resources: Memory {result.resource_usage.peak_memory_mb:.1f}MB, "
-                  f"CPU {result.resource_usage.cpu_time_seconds:.3f}s")
-        
-        # Small delay between tests
-        time.sleep(0.5)
+        for future in as_completed(futures):
+            i, name, script_id, args = futures[future]
+            result = future.result()
+            
+            # Buffer the block and write it in one go so it can't interleave
+            # with alert output
+            buf = io.StringIO()
+            print(f"\n   Test {i}: {name}", file=buf)
+            print(f"   Script: {script_id}", file=buf)
+            print(f"   Args: {args}", file=buf)
+            
+            # Show results
+            if result.success:
+                print(f"   ✓ Success! Duration: {result.execution_time:.3f}s", file=buf)
+                if result.outputs:
+                    print(f"   Outputs: {result.outputs}", file=buf)
+            else:
+                print(f"   ✗ Failed: {result.error}", file=buf)
+                if result.error_details:
+                    print(f"   Category: {result.error_details.category.value}", file=buf)
+                    print(f"   Suggestions:", file=buf)
+                    for suggestion in result.error_details.suggestions[:2]:
+                        print(f"     - {suggestion}", file=buf)
+            
+            # Show resource usage if available
+            if result.resource_usage:
+                print(f"   Resources: Memory {result.resource_usage.peak_memory_mb:.1f}MB, "
+                      f"CPU {result.resource_usage.cpu_time_seconds:.3f}s", file=buf)
+            
+            with output_lock:
+                sys.stdout.write(buf.getvalue())
+                sys.stdout.flush()
+    
+    # Let the async logger write the entries before reading them
+    if logger is not None:
+        logger.wait_idle()
+    
+    # Snapshot the report now that the executions are recorded; the
+    # aggregator keeps it fresh from here on
+    if metrics is not None:
+        metrics.start_background_report(interval_s=1, period_minutes=5)
     
     # Show statistics
     print("\n3. Execution Statistics:")
-    if hasattr(tes, 'logger'):
-        stats = tes.logger.get_statistics()
+    if logger is not None:
+        stats = logger.get_statistics()
         
         total = stats.get('total_executions', 0)
         successful = stats.get('successful_executions', 0)
@@ -141,8 +198,8 @@ def test_monitoring():
     
     # Show metrics report
     print("\n4. Metrics Report (last 5 minutes):")
-    if hasattr(tes, 'metrics'):
-        report = tes.metrics.generate_report(period_minutes=5)
+    if metrics is not None:
+        report = metrics.get_cached_report()
         
         if report.get('execution_stats'):
             exec_stats = report['execution_stats']
@@ -155,7 +212,7 @@ def test_monitoring():
         
         # Check for alerts
         print("\n   Active Alerts:")
-        alerts = tes.metrics.get_alerts()
+        alerts = metrics.get_alerts()
         if alerts:
             for alert in alerts[-5:]:  # Show last 5 alerts
                 print(f"     [{alert['severity']}] {alert['message']}")
@@ -164,30 +221,29 @@ def test_monitoring():
     
     # Export Prometheus metrics
     print("\n5. Prometheus Metrics Sample:")
-    if hasattr(tes, 'metrics'):
-        prometheus_metrics = tes.metrics.export_prometheus()
-        if prometheus_metrics:
-            # Show first few lines
-            lines = prometheus_metrics.split('\n')[:5]
-            for line in lines:
-                print(f"   {line}")
-            if len(prometheus_metrics.split('\n')) > 5:
-                print(f"   ... ({len(prometheus_metrics.split('\n')) - 5} more lines)")
+    if metrics is not None:
+        # Show first few lines, only counting the rest
+        lines = metrics.iter_export_prometheus()
+        for line in islice(lines, 5):
+            print(f"   {line}")
+        extra = sum(1 for _ in lines)
+        if extra > 0:
+            print(f"   ... ({extra} more lines)")
     
     # Query logs
     print("\n6. Recent Execution Logs:")
-    if hasattr(tes, 'logger'):
-        recent_logs = tes.logger.query(limit=5)
+    if logger is not None:
+        recent_logs = logger.query(limit=5)
         for log in recent_logs:
             status = "SUCCESS" if log.success else "FAILED"
             print(f"   [{log.timestamp}] {status} {log.script_id} ({log.duration_seconds:.3f}s)")
     
     # Shutdown
     print("\n7. Shutting down monitoring...")
-    if hasattr(tes, 'logger'):
-        tes.logger.shutdown()
-    if hasattr(tes, 'metrics'):
-        tes.metrics.shutdown()
+    if logger is not None:
+        logger.shutdown()
+    if metrics is not None:
+        metrics.shutdown()
     print("   ✓ Monitoring shutdown complete")
     
     # Summary of alerts received
@@ -202,94 +258,96 @@ def test_monitoring():
     print("To export metrics, run: ./monitoring/metrics-collector.py --prometheus")
 
 
-# Create some test scripts in the registry for demonstration
-def create_test_registry():
-    """Create a test registry with sample scripts"""
-    registry = {
-        "version": "1.0",
-        "scripts": [
-            {
-                "id": "echo_test",
-                "name": "Echo Test",
-                "description": "Simple echo script for testing",
-                "specialist": "test",
-                "path": "test/echo.sh",
-                "execution": {
-                    "interpreter": "/bin/bash",
-                    "timeout": 5000,
-                    "args": [
-                        {
-                            "name": "message",
-                            "type": "string",
-                            "required": True,
-                            "description": "Message to echo"
-                        }
-                    ]
-                },
-                "security": {
-                    "sandbox": "minimal",
-                    "max_memory": "256MB"
-                }
+# Registry written by create_test_registry; only ever serialized, never modified
+_REGISTRY_TEMPLATE = {
+    "version": "1.0",
+    "scripts": [
+        {
+            "id": "echo_test",
+            "name": "Echo Test",
+            "description": "Simple echo script for testing",
+            "specialist": "test",
+            "path": "test/echo.sh",
+            "execution": {
+                "interpreter": "/bin/bash",
+                "timeout": 5000,
+                "args": [
+                    {
+                        "name": "message",
+                        "type": "string",
+                        "required": True,
+                        "description": "Message to echo"
+                    }
+                ]
             },
-            {
-                "id": "json_output_test",
-                "name": "JSON Output Test",
-                "description": "Script that produces JSON output",
-                "specialist": "test",
-                "path": "test/json_output.py",
-                "execution": {
-                    "interpreter": "/usr/bin/python3",
-                    "timeout": 5000,
-                    "args": [
-                        {
-                            "name": "data",
-                            "type": "object",
-                            "required": True,
-                            "description": "Data to process"
-                        }
-                    ]
-                },
-                "outputs": [
+            "security": {
+                "sandbox": "minimal",
+                "max_memory": "256MB"
+            }
+        },
+        {
+            "id": "json_output_test",
+            "name": "JSON Output Test",
+            "description": "Script that produces JSON output",
+            "specialist": "test",
+            "path": "test/json_output.py",
+            "execution": {
+                "interpreter": "/usr/bin/python3",
+                "timeout": 5000,
+                "args": [
                     {
-                        "name": "processed",
+                        "name": "data",
                         "type": "object",
-                        "description": "Processed data"
-                    },
-                    {
-                        "name": "timestamp",
-                        "type": "string",
-                        "description": "Processing timestamp"
+                        "required": True,
+                        "description": "Data to process"
                     }
-                ],
-                "security": {
-                    "sandbox": "standard",
-                    "max_memory": "512MB"
+                ]
+            },
+            "outputs": [
+                {
+                    "name": "processed",
+                    "type": "object",
+                    "description": "Processed data"
+                },
+                {
+                    "name": "timestamp",
+                    "type": "string",
+                    "description": "Processing timestamp"
                 }
+            ],
+            "security": {
+                "sandbox": "standard",
+                "max_memory": "512MB"
             }
-        ]
-    }
-    
-    # Write test registry
+        }
+    ]
+}
+
+
+# Create some test scripts in the registry for demonstration
+def create_test_registry():
+    """Create a test registry with sample scripts"""
+    # Write test registry and scripts, skipping any already up to date
     registry_path = Path(__file__).parent.parent / 'test_registry.json'
-    with open(registry_path, 'w') as f:
-        json.dump(registry, f, indent=2)
+    if ORJSON_AVAILABLE:
+        payload = orjson.dumps(_REGISTRY_TEMPLATE, option=orjson.OPT_INDENT_2)
+    else:
+        payload = json.dumps(_REGISTRY_TEMPLATE, indent=2).encode()
+    _write_if_changed(registry_path, payload)
     
     # Create test scripts directory
     test_dir = Path(__file__).parent.parent / 'test'
     test_dir.mkdir(exist_ok=True)
     
     # Create echo script
-    echo_script = test_dir / 'echo.sh'
-    echo_script.write_text('''#!/bin/bash
+    _write_if_changed(test_dir / 'echo.sh', b'''#!/bin/bash
 message="$1"
 echo "Echo: $message"
 exit 0
-''')
-    echo_script.chmod(0o755)
+''', mode=0o755)
     
     # Create JSON output script
-    json_script = test_dir / 'json_output.py'
-    json_script.write_text('''#!/usr/bin/env python3
+    _write_if_changed(test_dir / 'json_output.py', b'''#!/usr/bin/env python3
 import sys
 import json
 from datetime import datetime
@@ -300,12 +358,19 @@ output = {
     "timestamp": datetime.now().isoformat()
 }
 print(json.dumps(output))
-''')
-    json_script.chmod(0o755)
+''', mode=0o755)
     
     return registry_path
 
 
+def _write_if_changed(path: Path, data: bytes, mode: int = None):
+    """Write data to path unless it already holds exactly those bytes"""
+    if not path.exists() or path.read_bytes() != data:
+        path.write_bytes(data)
+    if mode is not None and path.stat().st_mode & 0o777 != mode:
+        path.chmod(mode)
+
+
 if __name__ == '__main__':
     # Create test registry if needed
     test_registry = Path(__file__).parent.parent / 'test_registry.json'
@@ -5,22 +5,23 @@ Test script to verify orchestration system is working correctly
 
 import sys
 import json
+import importlib.util
 from pathlib import Path
 
-# Add core directory to path
-sys.path.insert(0, str(Path(__file__).parent / 'core'))
+CORE_DIR = Path(__file__).parent / 'core'
 
-# Check for required dependencies
-missing_deps = []
-try:
-    import jsonpath_ng
-except ImportError:
-    missing_deps.append('jsonpath-ng')
+# Check for required dependencies without importing them
+REQUIRED_DEPS = {'jsonpath_ng': 'jsonpath-ng', 'yaml': 'pyyaml'}
+missing_deps = [
+    package for module, package in REQUIRED_DEPS.items()
+    if importlib.util.find_spec(module) is None
+]
 
-try:
-    import yaml
-except ImportError:
-    missing_deps.append('pyyaml')
+if missing_deps and __name__ != '__main__':
+    # Collected by pytest: skip instead of aborting the whole session
+    import pytest
+    pytest.skip(f"missing dependencies: {', '.join(missing_deps)}",
+                allow_module_level=True)
 
 if missing_deps:
     print("✗ Missing required dependencies:")
@@ -32,14 +33,31 @@ if missing_deps:
     print(f"  pip install {' '.join(missing_deps)}")
     sys.exit(1)
 
-try:
-    from output_mapper import OutputMapper, OutputTransformer
-    from workflow_controller import WorkflowController, ConditionEvaluator, TaskStatus
-    print("✓ Core modules imported successfully")
-except ImportError as e:
-    print(f"✗ Failed to import core modules: {e}")
-    print("\nMake sure you're in the correct directory or that the core modules exist.")
-    sys.exit(1)
+# Load modules with hyphens in their names; workflow-controller imports
+# output_mapper, so that one is registered first
+def load_module(name, path):
+    # Reuse a module already loaded in this process instead of re-executing it
+    if name in sys.modules:
+        return sys.modules[name]
+    
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return module
+
+output_mapper = load_module('output_mapper', CORE_DIR / 'output-mapper.py')
+workflow_controller = load_module('workflow_controller', CORE_DIR / 'workflow-controller.py')
+OutputMapper = output_mapper.OutputMapper
+OutputTransformer = output_mapper.OutputTransformer
+WorkflowController = workflow_controller.WorkflowController
+ConditionEvaluator = workflow_controller.ConditionEvaluator
+TaskStatus = workflow_controller.TaskStatus
+print("✓ Core modules imported successfully")
 
 def test_output_mapper():
     """Test output mapping functionality"""
@@ -68,7 +86,7 @@ def test_output_mapper():
             "transform": "number"
         },
         {
-            "source": "$.data.users[?(@.active)].name",
+            "source": "$.data.users[?(@.active == true)].name",
             "target": "active_users",
             "transform": "array"
         },
@@ -83,8 +101,8 @@ def test_output_mapper():
     
     # Verify results
     assert result['user_count'] == 3, "User count should be 3"
-    assert set(result['active_users']) == {"Alice", "Charlie"}, "Active users incorrect"
-    assert set(result['high_scorers']) == {"Alice", "Charlie"}, "High scorers incorrect"
+    assert result['active_users'] == ["Alice", "Charlie"], "Active users incorrect"
+    assert result['high_scorers'] == ["Alice", "Charlie"], "High scorers incorrect"
     
     print("✓ Output mapping tests passed")
     print(f"  - Extracted user count: {result['user_count']}")
@@ -146,6 +164,20 @@ def test_transformations():
     reduced = transformer.reduce_array(data, "sum")
     assert reduced == 15
     
+    # Pipelines are usually written with a space after each colon
+    piped = OutputMapper().map_output({"nums": [1, 2, 5, 8]}, [{
+        "source": "$.nums",
+        "target": "big",
+        "transform": "filter: item > 3|map: item * 10"
+    }])
+    assert piped == {"big": [50, 80]}
+    
+    # Larger numeric arrays take the operator fast paths
+    big = list(range(10000))
+    assert transformer.filter_array(big, "item > 9997") == [9998, 9999]
+    assert transformer.map_array(big, "item * 2")[-1] == 19998
+    assert transformer.reduce_array(big, "sum") == 49995000
+    
     print("✓ Transformation tests passed")
 
 def test_backward_compatibility():
@@ -175,6 +207,15 @@ def test_backward_compatibility():
     assert result['my_variable'] == "success"
     assert result['status_code'] == 200
     
+    # Mapping again reuses the compiled JSONPath expressions
+    hits = mapper._parse.cache_info().hits
+    assert mapper.map_output(test_data, new_style) == result
+    assert mapper._parse.cache_info().hits >= hits + len(new_style), \
+        "JSONPath expressions should be cached"
+    
+    # Old-style dicts are also accepted directly
+    assert mapper.map_output(test_data, old_style) == result
+    
     print("✓ Backward compatibility tests passed")
 
 def main():